@@ -7,79 +7,349 @@ A Python script to manage local testnet operations
 import json
 import time
 import argparse
+import random
+import shlex
 import subprocess
+import statistics
+import threading
 import requests
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import os
 import sys
 
+# orjson is optional; fall back to the stdlib encoder/decoder when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.completion import WordCompleter
+except ImportError:
+    PromptSession = None
+
+# Probe latency bands in seconds: below WARN is healthy, at or above ERROR is degraded
+LATENCY_WARN = 0.1
+LATENCY_ERROR = 0.2
+# Weights for the node score (reliability vs. latency)
+RELIABILITY_WEIGHT = 0.6
+LATENCY_WEIGHT = 0.4
+# Transient request failures are retried with jittered exponential backoff (~50ms, 150ms, ...)
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.05
+
 class PolyTorusTestnet:
-    def __init__(self):
+    def __init__(self, tx_timeout: float = 2.0, tx_poll_interval: float = 0.05,
+                 health_check_timeout: float = 2.0, health_check_interval: float = 10.0,
+                 max_consecutive_failures: int = 5, failure_cooldown: float = 30.0,
+                 json_output: bool = False):
         self.api_base = "http://localhost:9020"
-        self.nodes = {
+        nodes = {
             "bootstrap": "http://localhost:9000",
             "miner-1": "http://localhost:9001", 
             "miner-2": "http://localhost:9002",
             "validator": "http://localhost:9003",
             "api-gateway": "http://localhost:9020"
         }
+        # Parallel per-node lists with probe URLs built once up front
+        self.node_names = list(nodes)
+        self.node_base_urls = list(nodes.values())
+        self.node_status_urls = [url + "/status" for url in self.node_base_urls]
+        # Precomputed API gateway endpoints
+        self._ep_status = self.api_base + "/status"
+        self._ep_wallet_create = self.api_base + "/wallet/create"
+        self._ep_wallet_list = self.api_base + "/wallet/list"
+        self._ep_balance_prefix = self.api_base + "/balance/"
+        self._ep_balance_batch = self.api_base + "/balance/batch"
+        self._ep_tx_send = self.api_base + "/transaction/send"
+        self._ep_tx_status_prefix = self.api_base + "/transaction/status/"
+        self._ep_tx_recent = self.api_base + "/transaction/recent"
+        self._ep_net_status = self.api_base + "/network/status"
+        self._ep_events = self.api_base + "/events"
+        # Shared session so probes and API calls reuse pooled connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.tx_timeout = tx_timeout
+        self.tx_poll_interval = tx_poll_interval
+        self.health_check_timeout = health_check_timeout
+        self.health_check_interval = health_check_interval
+        # Nodes failing this many probes in a row are skipped for failure_cooldown seconds
+        self.max_consecutive_failures = max_consecutive_failures
+        self.failure_cooldown = failure_cooldown
+        self._consec_failures: Dict[str, int] = {}
+        # Last-known state per node: name -> (online, checked_at)
+        self._last_probe: Dict[str, Tuple[bool, float]] = {}
+        # Per-node probe history used for latency reporting and scoring
+        self._latencies: Dict[str, deque] = {}
+        self._probe_counts: Dict[str, List[int]] = {}
+        # Short-lived read cache: key -> (fetched_at, value)
+        self.cache_ttl = 2.0
+        # The wallet list only changes through create_wallet, which invalidates it
+        self.wallets_cache_ttl = 10.0
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        # Flipped off once the gateway answers 404/405/501 for /balance/batch
+        self._batch_balance_supported = True
+        # Flipped off once the gateway answers 405/501 for /transaction/status/<hash>, or 404s
+        # a transaction's whole timeout without ever having answered 200
+        self._tx_status_supported = True
+        self._tx_status_seen_ok = False
+        # Transaction confirmations pushed over the gateway's event stream, when it has one
+        self._events_lock = threading.Lock()
+        self._event_stream_alive = False
+        self._pending: Dict[str, threading.Event] = {}
+        # Confirmed hashes nobody has waited for yet, oldest first
+        self._confirmed: OrderedDict = OrderedDict()
+        # Emit JSON lines instead of human-readable text
+        self.json_output = json_output
+    
+    def emit(self, message: Optional[str], event: Optional[Dict] = None):
+        """Report an output line: message in human mode, event as a JSON line in JSON mode.
+        
+        JSON lines are buffered; call flush_output() once the run (or command) is done.
+        """
+        if not self.json_output:
+            if message is not None:
+                print(message)
+        elif event is not None:
+            line = orjson.dumps(event) if orjson is not None else json.dumps(event).encode()
+            sys.stdout.buffer.write(line + b"\n")
+    
+    def flush_output(self):
+        """Flush buffered output"""
+        sys.stdout.flush()
+    
+    def _cached(self, key: Tuple, fn: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return a cached value for key, refetching via fn once it is older than ttl (default cache_ttl)"""
+        if ttl is None:
+            ttl = self.cache_ttl
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry is not None and now - entry[0] < ttl:
+            return entry[1]
+        value = fn()
+        # Failed lookups are not cached so the next call retries
+        if value is not None:
+            self._cache[key] = (now, value)
+        return value
+    
+    def _invalidate(self, *keys: Tuple):
+        """Drop cached entries so the next read hits the API"""
+        for key in keys:
+            self._cache.pop(key, None)
         
-    def check_node_status(self, node_url: str) -> bool:
+    def _request_with_retry(self, method: str, url: str, retry_on=(requests.exceptions.RequestException,),
+                            give_up_on=(), attempts: int = RETRY_ATTEMPTS, **kwargs) -> requests.Response:
+        """Issue a request on the shared session, retrying failures listed in retry_on unless in give_up_on"""
+        for attempt in range(attempts):
+            try:
+                return self.session.request(method, url, **kwargs)
+            except retry_on as e:
+                if attempt == attempts - 1 or isinstance(e, give_up_on):
+                    raise
+                time.sleep(RETRY_BASE_DELAY * (3 ** attempt) * (0.5 + random.random()))
+    
+    def _get_with_retry(self, url: str, **kwargs) -> requests.Response:
+        return self._request_with_retry("GET", url, **kwargs)
+    
+    def _post_with_retry(self, url: str, idempotent: bool = False, **kwargs) -> requests.Response:
+        # Non-idempotent POSTs are only retried when the connection was never established
+        retry_on = (requests.exceptions.RequestException,) if idempotent else (requests.exceptions.ConnectTimeout,)
+        return self._request_with_retry("POST", url, retry_on=retry_on, **kwargs)
+    
+    @staticmethod
+    def _json(response: requests.Response) -> Any:
+        """Decode a JSON response body"""
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return json.loads(response.content)
+    
+    @staticmethod
+    def _json_body(payload: Any) -> Dict:
+        """Request kwargs carrying payload as an encoded JSON body"""
+        data = orjson.dumps(payload) if orjson is not None else json.dumps(payload)
+        return {"data": data, "headers": {"Content-Type": "application/json"}}
+    
+    def is_cooling_down(self, name: str) -> bool:
+        """Whether a failing node is currently skipped instead of probed"""
+        last = self._last_probe.get(name)
+        return (last is not None and not last[0]
+                and self._consec_failures.get(name, 0) >= self.max_consecutive_failures
+                and time.monotonic() - last[1] < self.failure_cooldown)
+    
+    def _probe(self, status_url: str) -> requests.Response:
+        """Probe a status URL with a GET, reading its small body so the connection goes back to the pool"""
+        # The nodes' /status routes are GET-only, so HEAD would only add a 405 round trip
+        # A timed-out probe is not retried, so a hung node costs one health_check_timeout;
+        # quick failures such as refused connections still get the jittered retries
+        return self._get_with_retry(status_url, timeout=self.health_check_timeout,
+                                    give_up_on=(requests.exceptions.Timeout,))
+    
+    def reset_failure_cooldowns(self):
+        """Forget recorded probe failures so every node is probed on the next check"""
+        self._consec_failures.clear()
+        self._last_probe.clear()
+    
+    def check_node_status(self, name: str, status_url: str) -> bool:
         """Check if a node is responsive"""
-        try:
-            response = requests.get(f"{node_url}/status", timeout=5)
-            return response.status_code == 200
-        except:
+        if self.is_cooling_down(name):
             return False
+        try:
+            response = self._probe(status_url)
+            online = response.status_code == 200
+            # Round-trip of the answering request only, excluding retries and backoff
+            elapsed = response.elapsed.total_seconds()
+        except requests.exceptions.RequestException:
+            online = False
+        
+        counts = self._probe_counts.setdefault(name, [0, 0])
+        counts[1] += 1
+        if online:
+            counts[0] += 1
+            self._latencies.setdefault(name, deque(maxlen=64)).append(elapsed)
+        
+        if online:
+            self._consec_failures.pop(name, None)
+        else:
+            self._consec_failures[name] = self._consec_failures.get(name, 0) + 1
+        self._last_probe[name] = (online, time.monotonic())
+        return online
     
-    def get_network_status(self) -> Dict:
-        """Get overall network status"""
-        status = {}
-        for name, url in self.nodes.items():
-            status[name] = {
-                "online": self.check_node_status(url),
-                "url": url
-            }
+    def warm_up(self):
+        """Open the pooled connection to the API gateway ahead of the first real call"""
+        self.check_node_status("api-gateway", self._ep_status)
+    
+    def node_latency(self, name: str) -> Optional[float]:
+        """Median latency of recent successful probes, in seconds"""
+        latencies = self._latencies.get(name)
+        if not latencies:
+            return None
+        return statistics.median(latencies)
+    
+    def node_score(self, name: str) -> Optional[float]:
+        """Score a node from 0 to 1 by probe reliability and median latency"""
+        successes, total = self._probe_counts.get(name, (0, 0))
+        if total == 0:
+            return None
+        reliability = successes / total
+        latency = self.node_latency(name)
+        latency_score = 0.0 if latency is None else min(max(1 - latency / LATENCY_ERROR, 0.0), 1.0)
+        return RELIABILITY_WEIGHT * reliability + LATENCY_WEIGHT * latency_score
+    
+    def get_network_status(self, force_refresh: bool = False) -> Dict:
+        """Get overall network status (nodes are probed in parallel)"""
+        if force_refresh:
+            self.reset_failure_cooldowns()
+        # Nodes in their failure cooldown report their last-known state without a probe
+        cached = {name: self.is_cooling_down(name) for name in self.node_names}
+        with ThreadPoolExecutor(max_workers=len(self.node_names)) as executor:
+            futures = [
+                executor.submit(self.check_node_status, name, status_url)
+                for name, status_url in zip(self.node_names, self.node_status_urls)
+            ]
+            status = {}
+            for name, url, future in zip(self.node_names, self.node_base_urls, futures):
+                status[name] = {
+                    "online": future.result(),
+                    "cached": cached[name],
+                    "url": url,
+                    "latency": self.node_latency(name),
+                    "score": self.node_score(name)
+                }
         return status
     
     def create_wallet(self) -> Optional[Dict]:
         """Create a new wallet"""
         try:
-            response = requests.post(f"{self.api_base}/wallet/create")
+            response = self._post_with_retry(self._ep_wallet_create)
             if response.status_code == 200:
-                return response.json()
+                self._invalidate(("wallets",))
+                return self._json(response)
             else:
-                print(f"Failed to create wallet: HTTP {response.status_code}")
+                self.emit(f"Failed to create wallet: HTTP {response.status_code}",
+                          {"event": "error", "op": "create_wallet", "status": response.status_code})
                 return None
-        except Exception as e:
-            print(f"Error creating wallet: {e}")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.emit(f"Error creating wallet: {e}", {"event": "error", "op": "create_wallet", "error": str(e)})
             return None
     
     def list_wallets(self) -> List[Dict]:
         """List all available wallets"""
+        return self._cached(("wallets",), self._fetch_wallets, self.wallets_cache_ttl) or []
+    
+    def _fetch_wallets(self) -> Optional[List[Dict]]:
         try:
-            response = requests.get(f"{self.api_base}/wallet/list")
+            response = self._get_with_retry(self._ep_wallet_list)
             if response.status_code == 200:
-                return response.json()
+                return self._json(response)
             else:
-                return []
-        except Exception as e:
-            print(f"Error listing wallets: {e}")
-            return []
+                return None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.emit(f"Error listing wallets: {e}", {"event": "error", "op": "list_wallets", "error": str(e)})
+            return None
     
     def get_balance(self, address: str) -> Optional[float]:
         """Get balance for an address"""
+        return self._cached(("balance", address), lambda: self._fetch_balance(address))
+    
+    def _fetch_balance(self, address: str) -> Optional[float]:
         try:
-            response = requests.get(f"{self.api_base}/balance/{address}")
+            response = self._get_with_retry(self._ep_balance_prefix + address)
             if response.status_code == 200:
-                data = response.json()
+                data = self._json(response)
                 return data.get('balance', 0)
             else:
                 return None
-        except Exception as e:
-            print(f"Error getting balance: {e}")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.emit(f"Error getting balance: {e}", {"event": "error", "op": "get_balance", "error": str(e)})
             return None
     
+    def get_balances(self, addresses: List[str], concurrency: int = 20) -> Dict[str, Optional[float]]:
+        """Get balances for several addresses in one request, or concurrent lookups without a batch endpoint"""
+        if not addresses:
+            return {}
+        if self._batch_balance_supported:
+            try:
+                response = self._post_with_retry(self._ep_balance_batch, idempotent=True,
+                                                 **self._json_body({"addresses": addresses}))
+                if response.status_code == 200:
+                    data = self._json(response)
+                    balances = data.get('balances', data) if isinstance(data, dict) else None
+                    if isinstance(balances, dict):
+                        now = time.monotonic()
+                        for address, balance in balances.items():
+                            if balance is not None:
+                                self._cache[("balance", address)] = (now, balance)
+                        # Addresses the batch response left out are looked up individually
+                        missing = [address for address in addresses if balances.get(address) is None]
+                        found = self._get_balances_concurrently(missing, concurrency)
+                        return {address: found[address] if address in found else balances[address]
+                                for address in addresses}
+                    self.emit("Unexpected /balance/batch response; looking up balances individually",
+                              {"event": "error", "op": "get_balances", "error": "unexpected response shape"})
+                elif response.status_code in (404, 405, 501):
+                    self._batch_balance_supported = False
+            except requests.exceptions.ConnectionError as e:
+                # Gateway unreachable: individual lookups would only hit it again once per address
+                self.emit(f"Error getting balances: {e}", {"event": "error", "op": "get_balances", "error": str(e)})
+                return dict.fromkeys(addresses)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.emit(f"Error getting balances: {e}", {"event": "error", "op": "get_balances", "error": str(e)})
+        
+        # No usable batch endpoint: fall back to concurrent single lookups
+        return self._get_balances_concurrently(addresses, concurrency)
+    
+    def _get_balances_concurrently(self, addresses: List[str], concurrency: int) -> Dict[str, Optional[float]]:
+        if not addresses:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(len(addresses), concurrency))) as executor:
+            return dict(zip(addresses, executor.map(self.get_balance, addresses)))
+    
     def send_transaction(self, from_addr: str, to_addr: str, amount: float, gas_price: int = 1) -> Optional[str]:
         """Send a transaction"""
         try:
@@ -89,76 +359,192 @@ class PolyTorusTestnet:
                 "amount": amount,
                 "gasPrice": gas_price
             }
-            response = requests.post(f"{self.api_base}/transaction/send", json=payload)
+            response = self._post_with_retry(self._ep_tx_send, **self._json_body(payload))
             if response.status_code == 200:
-                data = response.json()
+                data = self._json(response)
+                self._invalidate(("balance", from_addr), ("balance", to_addr), ("stats",))
                 return data.get('hash')
             else:
-                print(f"Failed to send transaction: HTTP {response.status_code}")
+                self.emit(f"Failed to send transaction: HTTP {response.status_code}",
+                          {"event": "error", "op": "send_transaction", "status": response.status_code})
                 return None
-        except Exception as e:
-            print(f"Error sending transaction: {e}")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.emit(f"Error sending transaction: {e}", {"event": "error", "op": "send_transaction", "error": str(e)})
             return None
     
-    def get_recent_transactions(self) -> List[Dict]:
-        """Get recent transactions"""
+    def start_event_stream(self) -> bool:
+        """Subscribe to the gateway's server-sent events for transaction confirmations.
+        
+        Returns False when the gateway has no event stream; confirmations are then polled.
+        """
+        if self._event_stream_alive:
+            return True
         try:
-            response = requests.get(f"{self.api_base}/transaction/recent")
+            response = self.session.get(self._ep_events, stream=True, headers={"Accept": "text/event-stream"},
+                                        timeout=(self.health_check_timeout, None))
+        except requests.exceptions.RequestException:
+            return False
+        if response.status_code != 200:
+            response.close()
+            return False
+        self._event_stream_alive = True
+        threading.Thread(target=self._read_event_stream, args=(response,), daemon=True).start()
+        return True
+    
+    def _read_event_stream(self, response: requests.Response):
+        try:
+            for line in response.iter_lines(chunk_size=None):
+                if not line.startswith(b"data:"):
+                    continue
+                try:
+                    event = orjson.loads(line[5:]) if orjson is not None else json.loads(line[5:])
+                except ValueError:
+                    continue
+                if not isinstance(event, dict) or event.get("type") != "tx_confirmed" or not event.get("hash"):
+                    continue
+                with self._events_lock:
+                    self._confirmed[event["hash"]] = None
+                    # Bound the backlog by evicting the oldest uncollected confirmations
+                    while len(self._confirmed) > 4096:
+                        self._confirmed.popitem(last=False)
+                    waiter = self._pending.get(event["hash"])
+                if waiter is not None:
+                    waiter.set()
+        except requests.exceptions.RequestException:
+            pass
+        finally:
+            response.close()
+            # Wake every waiter so it can fall back to polling
+            with self._events_lock:
+                self._event_stream_alive = False
+                waiters = list(self._pending.values())
+            for waiter in waiters:
+                waiter.set()
+    
+    def wait_for_transaction(self, tx_hash: str) -> bool:
+        """Wait until the node reports the transaction, up to tx_timeout seconds"""
+        deadline = time.monotonic() + self.tx_timeout
+        # Liveness is checked and the waiter registered under one lock, so a stream that
+        # drops concurrently always wakes this waiter
+        with self._events_lock:
+            if tx_hash in self._confirmed:
+                del self._confirmed[tx_hash]
+                return True
+            waiter = self._pending.setdefault(tx_hash, threading.Event()) if self._event_stream_alive else None
+        if waiter is not None:
+            waiter.wait(self.tx_timeout)
+            with self._events_lock:
+                self._pending.pop(tx_hash, None)
+                if tx_hash in self._confirmed:
+                    del self._confirmed[tx_hash]
+                    return True
+                if self._event_stream_alive:
+                    return False
+        
+        # No event stream (or it dropped): poll the status endpoint. A 404 is an unindexed
+        # hash, not a missing route, so polling continues until the deadline
+        answered_404 = False
+        while self._tx_status_supported and time.monotonic() < deadline:
+            try:
+                response = self.session.get(self._ep_tx_status_prefix + tx_hash, timeout=self.tx_timeout)
+                if response.status_code == 200:
+                    self._tx_status_seen_ok = True
+                    return True
+                if response.status_code in (405, 501):
+                    # Gateway has no status route; stop polling it for this and later transactions
+                    self._tx_status_supported = False
+                    break
+                answered_404 = answered_404 or response.status_code == 404
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(self.tx_poll_interval)
+        
+        # A route that 404s a transaction's whole window and has never answered 200 is
+        # treated as missing, so later waits return at once instead of polling
+        if answered_404 and not self._tx_status_seen_ok:
+            self._tx_status_supported = False
+        return False
+    
+    def get_recent_transactions(self, limit: int = 10) -> List[Dict]:
+        """Get the most recent transactions, at most limit of them"""
+        try:
+            response = self._get_with_retry(self._ep_tx_recent, params={"limit": limit})
             if response.status_code == 200:
-                return response.json()
+                # Gateways that ignore ?limit= still return the full history
+                txs = self._json(response)
+                return txs[max(len(txs) - limit, 0):] if limit > 0 else []
             else:
                 return []
-        except Exception as e:
-            print(f"Error getting transactions: {e}")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.emit(f"Error getting transactions: {e}", {"event": "error", "op": "get_recent_transactions", "error": str(e)})
             return []
     
     def get_blockchain_stats(self) -> Optional[Dict]:
         """Get blockchain statistics"""
+        return self._cached(("stats",), self._fetch_blockchain_stats)
+    
+    def _fetch_blockchain_stats(self) -> Optional[Dict]:
         try:
-            response = requests.get(f"{self.api_base}/network/status")
+            response = self._get_with_retry(self._ep_net_status)
             if response.status_code == 200:
-                return response.json()
+                return self._json(response)
             else:
                 return None
-        except Exception as e:
-            print(f"Error getting blockchain stats: {e}")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.emit(f"Error getting blockchain stats: {e}", {"event": "error", "op": "get_blockchain_stats", "error": str(e)})
             return None
 
-def print_status(testnet: PolyTorusTestnet):
+def print_status(testnet: PolyTorusTestnet, force_refresh: bool = False):
     """Print network status"""
-    print("🌐 PolyTorus Local Testnet Status")
-    print("=" * 40)
+    testnet.emit("🌐 PolyTorus Local Testnet Status")
+    testnet.emit("=" * 40)
     
-    status = testnet.get_network_status()
+    status = testnet.get_network_status(force_refresh)
     for name, info in status.items():
-        status_icon = "✅" if info["online"] else "❌"
-        print(f"{status_icon} {name.capitalize()}: {info['url']}")
+        latency = info["latency"]
+        if not info["online"]:
+            status_icon = "❌"
+        elif latency is None or latency < LATENCY_WARN:
+            status_icon = "🟢"
+        elif latency < LATENCY_ERROR:
+            status_icon = "🟡"
+        else:
+            status_icon = "🔴"
+        details = ""
+        if info["cached"]:
+            details = " (offline, not re-probed during cooldown)"
+        elif info["online"] and latency is not None:
+            details = f" ({latency * 1000:.1f} ms, score {info['score']:.2f})"
+        testnet.emit(f"{status_icon} {name.capitalize()}: {info['url']}{details}",
+                     {"event": "node_status", "node": name, **info})
     
-    print("\n📊 Blockchain Statistics")
-    print("-" * 25)
+    testnet.emit("\n📊 Blockchain Statistics")
+    testnet.emit("-" * 25)
     stats = testnet.get_blockchain_stats()
     if stats:
-        print(f"Block Height: {stats.get('blockHeight', 'N/A')}")
-        print(f"Total Transactions: {stats.get('totalTransactions', 'N/A')}")
-        print(f"Difficulty: {stats.get('difficulty', 'N/A')}")
+        testnet.emit(f"Block Height: {stats.get('blockHeight', 'N/A')}\n"
+                     f"Total Transactions: {stats.get('totalTransactions', 'N/A')}\n"
+                     f"Difficulty: {stats.get('difficulty', 'N/A')}",
+                     {"event": "blockchain_stats", **stats})
     else:
-        print("Unable to fetch blockchain statistics")
+        testnet.emit("Unable to fetch blockchain statistics",
+                     {"event": "error", "op": "get_blockchain_stats", "error": "unavailable"})
 
-def interactive_mode(testnet: PolyTorusTestnet):
-    """Interactive command mode"""
-    print("🎮 PolyTorus Interactive Mode")
-    print("Type 'help' for available commands, 'quit' to exit")
-    
-    while True:
-        try:
-            command = input("\npolytest> ").strip().lower()
-            
-            if command == 'quit' or command == 'exit':
-                break
-            elif command == 'help':
-                print("""
+def watch_status(testnet: PolyTorusTestnet):
+    """Reprint network status every health_check_interval seconds"""
+    try:
+        while True:
+            print_status(testnet)
+            testnet.emit("")
+            testnet.flush_output()
+            time.sleep(testnet.health_check_interval)
+    except KeyboardInterrupt:
+        testnet.emit("\nExiting...")
+
+def _cmd_help(testnet: PolyTorusTestnet, args: List[str]):
+    testnet.emit("""
 Available commands:
-  status          - Show network status
+  status [--force] - Show network status (--force re-probes skipped nodes)
   wallets         - List all wallets  
   create-wallet   - Create a new wallet
   balance <addr>  - Get balance for address
@@ -167,103 +553,179 @@ Available commands:
   stats           - Show blockchain statistics
   help            - Show this help
   quit/exit       - Exit interactive mode
-                """)
-            elif command == 'status':
-                print_status(testnet)
-            elif command == 'wallets':
-                wallets = testnet.list_wallets()
-                if wallets:
-                    print("\n👛 Available Wallets:")
-                    for i, wallet in enumerate(wallets, 1):
-                        print(f"{i}. {wallet['address']} ({wallet.get('type', 'unknown')})")
-                else:
-                    print("No wallets found. Create one with 'create-wallet'")
-            elif command == 'create-wallet':
-                wallet = testnet.create_wallet()
-                if wallet:
-                    print(f"✅ New wallet created: {wallet['address']}")
-                else:
-                    print("❌ Failed to create wallet")
-            elif command.startswith('balance '):
-                parts = command.split()
-                if len(parts) == 2:
-                    address = parts[1]
-                    balance = testnet.get_balance(address)
-                    if balance is not None:
-                        print(f"💰 Balance: {balance} POLY")
-                    else:
-                        print("❌ Failed to get balance")
-                else:
-                    print("Usage: balance <address>")
-            elif command.startswith('send '):
-                parts = command.split()
-                if len(parts) >= 4:
-                    from_addr = parts[1]
-                    to_addr = parts[2]
-                    try:
-                        amount = float(parts[3])
-                        tx_hash = testnet.send_transaction(from_addr, to_addr, amount)
-                        if tx_hash:
-                            print(f"✅ Transaction sent: {tx_hash}")
-                        else:
-                            print("❌ Failed to send transaction")
-                    except ValueError:
-                        print("❌ Invalid amount")
-                else:
-                    print("Usage: send <from_address> <to_address> <amount>")
-            elif command == 'transactions':
-                txs = testnet.get_recent_transactions()
-                if txs:
-                    print("\n📋 Recent Transactions:")
-                    for tx in txs[-10:]:  # Show last 10
-                        print(f"  {tx['hash'][:16]}... {tx['from'][:8]}→{tx['to'][:8]} {tx['amount']} POLY")
-                else:
-                    print("No recent transactions")
-            elif command == 'stats':
-                stats = testnet.get_blockchain_stats()
-                if stats:
-                    print(f"\n📊 Blockchain Statistics:")
-                    print(f"Block Height: {stats.get('blockHeight', 'N/A')}")
-                    print(f"Total Transactions: {stats.get('totalTransactions', 'N/A')}")
-                    print(f"Difficulty: {stats.get('difficulty', 'N/A')}")
-                else:
-                    print("❌ Unable to fetch statistics")
-            elif command == '':
+    """, {"event": "help", "commands": list(COMMANDS) + ["quit", "exit"]})
+
+def _cmd_status(testnet: PolyTorusTestnet, args: List[str]):
+    print_status(testnet, force_refresh="--force" in args)
+
+def _cmd_wallets(testnet: PolyTorusTestnet, args: List[str]):
+    wallets = testnet.list_wallets()
+    if wallets:
+        testnet.emit("\n👛 Available Wallets:", {"event": "wallets", "wallets": wallets})
+        for i, wallet in enumerate(wallets, 1):
+            testnet.emit(f"{i}. {wallet['address']} ({wallet.get('type', 'unknown')})")
+    else:
+        testnet.emit("No wallets found. Create one with 'create-wallet'", {"event": "wallets", "wallets": []})
+
+def _cmd_create_wallet(testnet: PolyTorusTestnet, args: List[str]):
+    wallet = testnet.create_wallet()
+    if wallet:
+        testnet.emit(f"✅ New wallet created: {wallet['address']}", {"event": "wallet_created", **wallet})
+    else:
+        testnet.emit("❌ Failed to create wallet", {"event": "error", "op": "create_wallet"})
+
+def _cmd_balance(testnet: PolyTorusTestnet, args: List[str]):
+    if len(args) != 1:
+        testnet.emit("Usage: balance <address>", {"event": "error", "op": "balance", "error": "usage"})
+        return
+    balance = testnet.get_balance(args[0])
+    if balance is not None:
+        testnet.emit(f"💰 Balance: {balance} POLY", {"event": "balance", "address": args[0], "balance": balance})
+    else:
+        testnet.emit("❌ Failed to get balance", {"event": "error", "op": "get_balance", "address": args[0]})
+
+def _cmd_send(testnet: PolyTorusTestnet, args: List[str]):
+    if len(args) < 3:
+        testnet.emit("Usage: send <from_address> <to_address> <amount>",
+                     {"event": "error", "op": "send", "error": "usage"})
+        return
+    from_addr, to_addr = args[0], args[1]
+    try:
+        amount = float(args[2])
+    except ValueError:
+        testnet.emit("❌ Invalid amount", {"event": "error", "op": "send", "error": "invalid amount"})
+        return
+    tx_hash = testnet.send_transaction(from_addr, to_addr, amount)
+    if tx_hash:
+        testnet.emit(f"✅ Transaction sent: {tx_hash}", {"event": "tx_sent", "hash": tx_hash})
+    else:
+        testnet.emit("❌ Failed to send transaction", {"event": "error", "op": "send_transaction"})
+
+def _cmd_transactions(testnet: PolyTorusTestnet, args: List[str]):
+    txs = testnet.get_recent_transactions()
+    testnet.emit(None, {"event": "transactions", "transactions": txs})
+    if txs:
+        testnet.emit("\n📋 Recent Transactions:")
+        for tx in txs:
+            testnet.emit(f"  {tx['hash'][:16]}... {tx['from'][:8]}→{tx['to'][:8]} {tx['amount']} POLY")
+    else:
+        testnet.emit("No recent transactions")
+
+def _cmd_stats(testnet: PolyTorusTestnet, args: List[str]):
+    stats = testnet.get_blockchain_stats()
+    if stats:
+        testnet.emit(f"\n📊 Blockchain Statistics:\n"
+                     f"Block Height: {stats.get('blockHeight', 'N/A')}\n"
+                     f"Total Transactions: {stats.get('totalTransactions', 'N/A')}\n"
+                     f"Difficulty: {stats.get('difficulty', 'N/A')}",
+                     {"event": "blockchain_stats", **stats})
+    else:
+        testnet.emit("❌ Unable to fetch statistics",
+                     {"event": "error", "op": "get_blockchain_stats", "error": "unavailable"})
+
+COMMANDS: Dict[str, Callable[[PolyTorusTestnet, List[str]], None]] = {
+    "status": _cmd_status,
+    "wallets": _cmd_wallets,
+    "create-wallet": _cmd_create_wallet,
+    "balance": _cmd_balance,
+    "send": _cmd_send,
+    "transactions": _cmd_transactions,
+    "stats": _cmd_stats,
+    "help": _cmd_help,
+}
+
+def interactive_mode(testnet: PolyTorusTestnet):
+    """Interactive command mode"""
+    testnet.emit("🎮 PolyTorus Interactive Mode")
+    testnet.emit("Type 'help' for available commands, 'quit' to exit")
+    
+    # prompt_toolkit adds history and tab completion when installed
+    if testnet.json_output:
+        # Keep stdout pure JSON lines; the prompt goes to stderr
+        def read_line():
+            sys.stderr.write("\npolytest> ")
+            sys.stderr.flush()
+            return input()
+    elif PromptSession is not None and sys.stdin.isatty():
+        session = PromptSession(completer=WordCompleter(list(COMMANDS) + ["quit", "exit"]))
+        read_line = lambda: session.prompt("\npolytest> ")
+    else:
+        read_line = lambda: input("\npolytest> ")
+    
+    while True:
+        try:
+            parts = shlex.split(read_line())
+            if not parts:
                 continue
+            command, args = parts[0].lower(), parts[1:]
+            
+            if command in ('quit', 'exit'):
+                break
+            handler = COMMANDS.get(command)
+            if handler is None:
+                testnet.emit(f"Unknown command: {command}. Type 'help' for available commands.",
+                             {"event": "error", "op": command, "error": "unknown command"})
             else:
-                print(f"Unknown command: {command}. Type 'help' for available commands.")
+                handler(testnet, args)
                 
-        except KeyboardInterrupt:
-            print("\nExiting...")
+        except (KeyboardInterrupt, EOFError):
+            testnet.emit("\nExiting...")
             break
         except Exception as e:
-            print(f"Error: {e}")
+            testnet.emit(f"Error: {e}", {"event": "error", "error": str(e)})
+        finally:
+            testnet.flush_output()
+
+def print_balances(testnet: PolyTorusTestnet, balances: Dict[str, Optional[float]]):
+    """Print balances as an address/balance table"""
+    testnet.emit("💰 Balances:", {"event": "balances", "balances": balances})
+    width = max((len(address) for address in balances), default=0)
+    for address, balance in balances.items():
+        shown = f"{balance} POLY" if balance is not None else "unavailable"
+        testnet.emit(f"  {address:<{width}}  {shown}")
 
-def send_test_transactions(testnet: PolyTorusTestnet, count: int = 5):
+def send_test_transactions(testnet: PolyTorusTestnet, count: int = 5, max_in_flight: int = 10):
     """Send test transactions automatically"""
-    print(f"🔄 Sending {count} test transactions...")
+    testnet.emit(f"🔄 Sending {count} test transactions...")
     
     wallets = testnet.list_wallets()
     if len(wallets) < 2:
-        print("❌ Need at least 2 wallets for test transactions")
+        testnet.emit("❌ Need at least 2 wallets for test transactions",
+                     {"event": "error", "op": "send_test_transactions", "error": "need at least 2 wallets"})
         return
     
-    sent = 0
-    for i in range(count):
-        from_wallet = wallets[i % len(wallets)]
-        to_wallet = wallets[(i + 1) % len(wallets)]
-        amount = 1.0 + (i * 0.1)  # Varying amounts
-        
-        tx_hash = testnet.send_transaction(from_wallet['address'], to_wallet['address'], amount)
+    # Confirmations arrive as pushed events when the gateway supports it, otherwise they are polled
+    testnet.start_event_stream()
+    
+    # Round-robin sender/recipient pairs with varying amounts, built once up front
+    addresses = [wallet['address'] for wallet in wallets]
+    n = len(addresses)
+    pairs = [(addresses[i % n], addresses[(i + 1) % n], 1.0 + (i * 0.1)) for i in range(count)]
+    
+    def send_one(pair: Tuple[str, str, float]) -> Optional[str]:
+        tx_hash = testnet.send_transaction(*pair)
         if tx_hash:
-            print(f"✅ Transaction {i+1}/{count}: {tx_hash[:16]}...")
-            sent += 1
-        else:
-            print(f"❌ Failed to send transaction {i+1}")
-        
-        time.sleep(2)  # Wait between transactions
+            testnet.wait_for_transaction(tx_hash)
+        return tx_hash
     
-    print(f"✅ Sent {sent}/{count} test transactions successfully")
+    # At most max_in_flight sends (each followed by its confirmation poll) run at once;
+    # results are reported as they complete
+    sent = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(count, max_in_flight))) as executor:
+        futures = {executor.submit(send_one, pair): i for i, pair in enumerate(pairs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            tx_hash = future.result()
+            if tx_hash:
+                testnet.emit(f"✅ Transaction {i+1}/{count}: {tx_hash[:16]}...",
+                             {"event": "tx_sent", "hash": tx_hash, "i": i + 1, "total": count})
+                sent += 1
+            else:
+                testnet.emit(f"❌ Failed to send transaction {i+1}",
+                             {"event": "tx_failed", "i": i + 1, "total": count})
+    
+    testnet.emit(f"✅ Sent {sent}/{count} test transactions successfully",
+                 {"event": "tx_summary", "sent": sent, "total": count})
 
 def main():
     parser = argparse.ArgumentParser(description="PolyTorus Local Testnet Manager")
@@ -273,41 +735,86 @@ def main():
     parser.add_argument('--create-wallet', action='store_true', help='Create a new wallet')
     parser.add_argument('--list-wallets', action='store_true', help='List all wallets')
     parser.add_argument('--balance', metavar='ADDRESS', help='Get balance for address')
+    parser.add_argument('--watch', action='store_true', help='With --status, refresh every --health-interval seconds')
+    parser.add_argument('--balances-all', action='store_true', help='Get balances for all wallets')
+    parser.add_argument('--balances', metavar='ADDR,ADDR,...', help='Get balances for a comma-separated list of addresses')
+    parser.add_argument('--balance-file', metavar='PATH', help='Get balances for the addresses in a file, one per line')
+    parser.add_argument('--tx-timeout', type=float, default=2.0, metavar='SECONDS',
+                        help='Max time to wait for a test transaction to be accepted (default: 2.0)')
+    parser.add_argument('--tx-poll-interval', type=float, default=0.05, metavar='SECONDS',
+                        help='Interval between transaction status polls (default: 0.05)')
+    parser.add_argument('--max-in-flight', type=int, default=10, metavar='COUNT',
+                        help='Max concurrent test transactions (default: 10)')
+    parser.add_argument('--health-timeout', type=float, default=2.0, metavar='SECONDS',
+                        help='Timeout for each node health probe (default: 2.0)')
+    parser.add_argument('--health-interval', type=float, default=10.0, metavar='SECONDS',
+                        help='Interval between status refreshes in --watch mode (default: 10.0)')
+    parser.add_argument('--max-failures', type=int, default=5, metavar='COUNT',
+                        help='Consecutive probe failures before a node is temporarily skipped (default: 5)')
+    parser.add_argument('--failure-cooldown', type=float, default=30.0, metavar='SECONDS',
+                        help='How long a failing node is skipped before being probed again (default: 30.0)')
+    parser.add_argument('--json', action='store_true', help='Emit one JSON event per line instead of text')
     
     args = parser.parse_args()
     
-    testnet = PolyTorusTestnet()
+    testnet = PolyTorusTestnet(
+        tx_timeout=args.tx_timeout,
+        tx_poll_interval=args.tx_poll_interval,
+        health_check_timeout=args.health_timeout,
+        health_check_interval=args.health_interval,
+        max_consecutive_failures=args.max_failures,
+        failure_cooldown=args.failure_cooldown,
+        json_output=args.json,
+    )
+    
+    if not args.status and (args.interactive or args.test_transactions or args.create_wallet
+                            or args.list_wallets or args.balance or args.balances_all
+                            or args.balances or args.balance_file):
+        testnet.warm_up()
     
-    if args.status:
+    if args.status and args.watch:
+        watch_status(testnet)
+    elif args.status:
         print_status(testnet)
     elif args.interactive:
         interactive_mode(testnet)
     elif args.test_transactions:
-        send_test_transactions(testnet, args.test_transactions)
+        send_test_transactions(testnet, args.test_transactions, args.max_in_flight)
     elif args.create_wallet:
-        wallet = testnet.create_wallet()
-        if wallet:
-            print(f"✅ New wallet created: {wallet['address']}")
-        else:
-            print("❌ Failed to create wallet")
+        _cmd_create_wallet(testnet, [])
     elif args.list_wallets:
+        _cmd_wallets(testnet, [])
+    elif args.balance:
+        _cmd_balance(testnet, [args.balance])
+    elif args.balances_all:
         wallets = testnet.list_wallets()
         if wallets:
-            print("👛 Available Wallets:")
-            for i, wallet in enumerate(wallets, 1):
-                print(f"{i}. {wallet['address']} ({wallet.get('type', 'unknown')})")
+            print_balances(testnet, testnet.get_balances([wallet['address'] for wallet in wallets]))
         else:
-            print("No wallets found")
-    elif args.balance:
-        balance = testnet.get_balance(args.balance)
-        if balance is not None:
-            print(f"💰 Balance: {balance} POLY")
+            testnet.emit("No wallets found", {"event": "balances", "balances": {}})
+    elif args.balances or args.balance_file:
+        addresses = [address.strip() for address in (args.balances or "").split(",")]
+        try:
+            if args.balance_file:
+                with open(args.balance_file) as f:
+                    addresses += [line.strip() for line in f if not line.lstrip().startswith("#")]
+        except OSError as e:
+            testnet.emit(f"❌ Cannot read address file: {e}",
+                         {"event": "error", "op": "balance_file", "error": str(e)})
         else:
-            print("❌ Failed to get balance")
+            # Drop blanks and duplicates, keeping the given order
+            addresses = list(dict.fromkeys(address for address in addresses if address))
+            if addresses:
+                print_balances(testnet, testnet.get_balances(addresses))
+            else:
+                testnet.emit("❌ No addresses given", {"event": "error", "op": "balances", "error": "no addresses"})
     else:
-        print("PolyTorus Local Testnet Manager")
-        print("Use --help for available options")
-        print("Quick start: python3 testnet_manager.py --interactive")
+        testnet.emit("PolyTorus Local Testnet Manager\n"
+                     "Use --help for available options\n"
+                     "Quick start: python3 testnet_manager.py --interactive",
+                     {"event": "error", "error": "no operation given", "usage": "see --help"})
+    
+    testnet.flush_output()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file